@@ -1,13 +1,25 @@
-import json
-from http.server import BaseHTTPRequestHandler
-from urllib.parse import urlparse, parse_qs
-from typing import Optional, Dict, Tuple
+import asyncio
+import threading
+from datetime import datetime
+from typing import Optional, Dict, List, Mapping, Tuple
 
+import orjson
+from cachetools import TTLCache
 import requests
+from requests.adapters import HTTPAdapter
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.routing import Route
+from urllib3.util.retry import Retry
 
 import app as appmod
 from app import (
     BASE_URL,
+    DATE_FORMAT_ISO,
+    DATE_FORMAT_SHORT,
+    UA_HEADERS,
+    bin_sort_key,
     step1_submit_postcode,
     step2_select_address,
     street_flow,
@@ -16,109 +28,133 @@ from app import (
 )
 
 
-def _process(postcode: str, address: Optional[str], out_format: str) -> Tuple[str, str, str]:
-    """Return (body, content_type, status_code) as strings."""
-    with requests.Session() as session:
-        try:
-            page_url, soup = step1_submit_postcode(session, BASE_URL, postcode)
-            page_url, soup = step2_select_address(session, page_url, soup, address)
-        except Exception:
-            # Fallback to street flow using a derived street fragment
-            street_hint = derive_street_from_hint(address or "") or (address or "").strip()
-            if not street_hint:
-                raise
-            page_url, soup = street_flow(session, BASE_URL, street_hint, postcode, address)
-
-    pnl = soup.find(id="BinDetailsPnl")
-    if not pnl:
+# Shared across invocations so warm instances reuse keep-alive TLS connections
+# to the council site instead of handshaking on every lookup.
+_ADAPTER = HTTPAdapter(
+    pool_connections=16,
+    pool_maxsize=64,
+    max_retries=Retry(total=2, backoff_factor=0.2),
+)
+
+
+def _new_session() -> requests.Session:
+    """A fresh cookie jar per lookup, backed by the shared connection pool.
+
+    Sessions are deliberately not closed: closing one would close the shared adapter.
+    """
+    session = requests.Session()
+    session.headers.update(UA_HEADERS)
+    session.mount("https://", _ADAPTER)
+    return session
+
+
+# Collection days change at most weekly, so repeat lookups are served from memory.
+CACHE_TTL = 6 * 3600
+_CACHE: TTLCache = TTLCache(maxsize=2048, ttl=CACHE_TTL)
+_CACHE_LOCK = threading.Lock()
+
+
+def _lookup(postcode: str, address: Optional[str]) -> Tuple[str, List[Tuple[str, datetime]]]:
+    """Scrape (address, [(bin, date), ...]) sorted soonest first."""
+    session = _new_session()
+    try:
+        page_url, content = step1_submit_postcode(session, BASE_URL, postcode)
+        page_url, doc = step2_select_address(session, page_url, content, address)
+    except Exception:
+        # Fallback to street flow using a derived street fragment
+        street_hint = derive_street_from_hint(address or "") or (address or "").strip()
+        if not street_hint:
+            raise
+        page_url, doc = street_flow(session, BASE_URL, street_hint, postcode, address)
+
+    pnl = doc.get_element_by_id("BinDetailsPnl", None)
+    if pnl is None:
         raise RuntimeError("BinDetailsPnl not found in response")
 
     addr, items = parse_bin_details(pnl)
-    pref = {"General": 0, "Recycling": 1, "Compost": 2}
-    order = sorted(items.items(), key=lambda kv: (kv[1], pref.get(kv[0], 99)))
+    order = sorted(items.items(), key=bin_sort_key)
+    return addr, order
+
+
+def _process(postcode: str, address: Optional[str], out_format: str) -> Tuple[bytes, str, str]:
+    """Return (body, content_type, status_code); the body is already encoded bytes."""
+    key = (postcode.upper().replace(" ", ""), (address or "").lower())
+    with _CACHE_LOCK:
+        result = _CACHE.get(key)
+    if result is None:
+        result = _lookup(postcode, address)
+        with _CACHE_LOCK:
+            _CACHE[key] = result
+    addr, order = result
 
     if out_format == "json":
         data = {
             "address": addr,
             "collections": [
-                {"type": name, "date": dt.strftime("%Y-%m-%d")}
+                {"type": name, "date": dt.strftime(DATE_FORMAT_ISO)}
                 for name, dt in order
             ],
         }
-        return json.dumps(data), "application/json", "200"
+        return orjson.dumps(data), "application/json", "200"
 
     lines = [f"{addr} bin collections"]
-    lines.extend(f"{name} - {dt.strftime('%d/%m/%y')}" for name, dt in order)
-    return "\n".join(lines), "text/plain; charset=utf-8", "200"
+    lines.extend(f"{name} - {dt.strftime(DATE_FORMAT_SHORT)}" for name, dt in order)
+    return "\n".join(lines).encode("utf-8"), "text/plain; charset=utf-8", "200"
 
 
-class Handler(BaseHTTPRequestHandler):
-    def do_POST(self):
-        try:
-            length = int(self.headers.get('Content-Length', '0'))
-            body = self.rfile.read(length) if length > 0 else b""
+async def _process_async(postcode: str, address: Optional[str], out_format: str) -> Tuple[bytes, str, str]:
+    """Awaitable _process: the blocking postbacks run on a worker thread.
+
+    Lets an async server keep serving other lookups while one waits on the council site.
+    """
+    return await asyncio.to_thread(_process, postcode, address, out_format)
+
+
+def _request_params(params: Mapping) -> Tuple[str, Optional[str], str, bool]:
+    """(postcode, address, format, debug) from a JSON body or query string."""
+    postcode = (params.get('postcode') or '').strip()
+    address = (params.get('address') or '').strip() or None
+    out_format = (params.get('format') or 'text').lower()
+    debug_flag = str(params.get('debug', '')).lower() in ('1', 'true', 'yes')
+    return postcode, address, out_format, debug_flag
+
+
+async def bin_endpoint(request: Request) -> Response:
+    try:
+        if request.method == 'POST':
+            body = await request.body()
             payload = {}
             if body:
                 try:
-                    payload = json.loads(body.decode('utf-8'))
+                    payload = orjson.loads(body)
                 except Exception:
                     payload = {}
-            postcode = (payload.get('postcode') or '').strip()
-            address = (payload.get('address') or '').strip() or None
-            out_format = (payload.get('format') or 'text').lower()
-            debug_flag = (str(payload.get('debug', '')).lower() in ('1', 'true', 'yes'))
-            if debug_flag:
-                appmod.VERBOSE = True
-                appmod.DEBUG_LOG.clear()
-            if not postcode:
-                raise ValueError("Missing required field: postcode")
-            try:
-                body_text, content_type, status = _process(postcode, address, out_format)
-            except Exception as e:
-                if debug_flag:
-                    trace = "\n".join(appmod.DEBUG_LOG[-50:])
-                    raise RuntimeError(f"{e}\n--- debug trace ---\n{trace}")
-                raise
-            self.send_response(int(status))
-            self.send_header('Content-Type', content_type)
-            self.end_headers()
-            self.wfile.write(body_text.encode('utf-8'))
-        except Exception as e:
-            self.send_response(400)
-            self.send_header('Content-Type', 'text/plain; charset=utf-8')
-            self.end_headers()
-            self.wfile.write(f"Error: {e}".encode('utf-8'))
-
-    def do_GET(self):
+            postcode, address, out_format, debug_flag = _request_params(payload)
+            missing = "Missing required field: postcode"
+        else:
+            postcode, address, out_format, debug_flag = _request_params(request.query_params)
+            missing = "Missing required query parameter: postcode"
+        # Copied into the worker thread along with the rest of this request's context
+        debug_log = appmod.start_debug_capture() if debug_flag else None
+        if not postcode:
+            raise ValueError(missing)
         try:
-            parsed = urlparse(self.path)
-            qs = parse_qs(parsed.query)
-            postcode = (qs.get('postcode', [''])[0]).strip()
-            address = (qs.get('address', [''])[0]).strip() or None
-            out_format = (qs.get('format', ['text'])[0]).lower()
-            debug_flag = (qs.get('debug', [''])[0]).lower() in ('1', 'true', 'yes')
-            if debug_flag:
-                appmod.VERBOSE = True
-                appmod.DEBUG_LOG.clear()
-            if not postcode:
-                raise ValueError("Missing required query parameter: postcode")
-            try:
-                body_text, content_type, status = _process(postcode, address, out_format)
-            except Exception as e:
-                if debug_flag:
-                    trace = "\n".join(appmod.DEBUG_LOG[-50:])
-                    raise RuntimeError(f"{e}\n--- debug trace ---\n{trace}")
-                raise
-            self.send_response(int(status))
-            self.send_header('Content-Type', content_type)
-            self.end_headers()
-            self.wfile.write(body_text.encode('utf-8'))
+            content, content_type, status = await _process_async(postcode, address, out_format)
         except Exception as e:
-            self.send_response(400)
-            self.send_header('Content-Type', 'text/plain; charset=utf-8')
-            self.end_headers()
-            self.wfile.write(f"Error: {e}".encode('utf-8'))
-
-    def log_message(self, format, *args):
-        # Suppress default logging to keep output clean
-        pass
+            if debug_log is not None:
+                trace = "\n".join(debug_log)
+                raise RuntimeError(f"{e}\n--- debug trace ---\n{trace}")
+            raise
+        return Response(
+            content,
+            status_code=int(status),
+            media_type=content_type,
+            headers={'Cache-Control': f'max-age={CACHE_TTL}'},
+        )
+    except Exception as e:
+        return Response(f"Error: {e}", status_code=400, media_type='text/plain; charset=utf-8')
+
+
+# ASGI entry point: Vercel serves it directly; locally run e.g.
+#   uvicorn api.bin:app --workers 4 --loop uvloop --http httptools
+app = Starlette(routes=[Route('/api/bin', bin_endpoint, methods=['GET', 'POST'])])
@@ -1,15 +1,37 @@
 import sys
+import re
+import threading
+import html
 import argparse
 import urllib.parse as urlparse
-from typing import Dict, Optional, Tuple
+from collections import deque
+from contextvars import ContextVar
+from typing import Deque, Dict, Iterator, List, Optional, Tuple
 
+from cachetools import TTLCache
+import lxml.etree
+import lxml.html
 import requests
-from bs4 import BeautifulSoup
+
+try:  # optional: lexbor-backed parser, faster than lxml for extract-only work
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
 from datetime import datetime
 
 
 BASE_URL = "https://online.belfastcity.gov.uk/find-bin-collection-day/Default.aspx"
 
+# Browser-like headers in case the site varies by UA; set once per session.
+UA_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/126.0 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8",
+    "Accept-Language": "en-GB,en;q=0.9",
+}
+
+# The site serves UTF-8; say so up front rather than letting libxml2 sniff.
+HTML_PARSER = lxml.html.HTMLParser(encoding="utf-8")
+
 
 def absolute_url(base: str, link: Optional[str]) -> str:
     if not link:
@@ -17,85 +39,249 @@ def absolute_url(base: str, link: Optional[str]) -> str:
     return urlparse.urljoin(base, link)
 
 
-def find_main_form(soup: BeautifulSoup) -> Tuple[str, Dict[str, str]]:
-    """Return (action_url, fields) for the main ASP.NET form."""
-    form = (
-        soup.find("form", id=True)
-        or soup.find("form", attrs={"name": True})
-        or soup.find("form")
-    )
-    if not form:
+def origin_of(url: str) -> str:
+    parts = urlparse.urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+BASE_ORIGIN = origin_of(BASE_URL)
+
+
+def stripped_strings(el: lxml.html.HtmlElement) -> List[str]:
+    """Non-blank text pieces under ``el``, stripped (like BS4's ``stripped_strings``)."""
+    return [t.strip() for t in el.itertext() if t.strip()]
+
+
+def node_text(el: lxml.html.HtmlElement) -> str:
+    return el.text_content().strip()
+
+
+def parse_html(content: bytes) -> lxml.html.HtmlElement:
+    return lxml.html.fromstring(content, parser=HTML_PARSER)
+
+
+# Elements never read back from a streamed page; emptied as soon as they close.
+_DISCARD_TAGS = {"script", "style"}
+
+
+def read_page(
+    resp: requests.Response, stop_id: Optional[str] = None, check: bool = True
+) -> lxml.html.HtmlElement:
+    """Incrementally parse a ``stream=True`` response.
+
+    With ``stop_id`` set, parsing ends once that element closes; the rest of the
+    body is still drained (unparsed) so the keep-alive connection goes back to
+    the pool. ``check`` raises for HTTP errors. The response is always closed.
+    """
+    parser = lxml.etree.HTMLPullParser(events=("end",), encoding="utf-8")
+    parser.set_element_class_lookup(lxml.html.HtmlElementClassLookup())
+    # On the results page the hidden inputs (VIEWSTATE) are dead weight too
+    discard = _DISCARD_TAGS | {"input"} if stop_id else _DISCARD_TAGS
+    try:
+        if check:
+            resp.raise_for_status()
+        chunks = resp.iter_content(65536)
+        for chunk in chunks:
+            parser.feed(chunk)
+            for _, el in parser.read_events():
+                if stop_id and el.get("id") == stop_id:
+                    for _ in chunks:
+                        pass
+                    return parser.close()
+                if el.tag in discard:
+                    el.clear(keep_tail=True)
+        return parser.close()
+    finally:
+        resp.close()
+
+
+def _add_input(fields: Dict[str, str], inp: lxml.html.HtmlElement) -> None:
+    name = inp.get("name")
+    itype = (inp.get("type") or "").lower()
+    if itype == "submit":
+        # skip submits; include only the one we "click" later
+        return
+    if itype in {"checkbox", "radio"}:
+        if inp.get("checked") is not None:
+            fields[name] = inp.get("value", "on")
+    else:
+        fields[name] = inp.get("value", "")
+
+
+_CONTROLS_XPATH = ".//input[@name!=''] | .//textarea[@name!=''] | .//select[@name!='']"
+
+
+def _main_form(doc: lxml.html.HtmlElement) -> lxml.html.HtmlElement:
+    forms = doc.xpath("//form")
+    if not forms:
         raise RuntimeError("No <form> found on page")
+    # Prefer a form with an id, then one with a name, then the first form
+    return next(
+        (f for f in forms if f.get("id") is not None),
+        next((f for f in forms if f.get("name") is not None), forms[0]),
+    )
 
-    action = form.get("action") or ""
-    fields: Dict[str, str] = {}
 
-    # inputs (exclude submit inputs; add explicitly when simulating a click)
-    for inp in form.find_all("input"):
-        name = inp.get("name")
-        if not name:
-            continue
-        itype = (inp.get("type") or "").lower()
-        if itype == "submit":
-            # skip submits; include only the one we "click" later
-            continue
-        if itype in {"checkbox", "radio"}:
-            if inp.has_attr("checked"):
-                fields[name] = inp.get("value", "on")
-        else:
-            fields[name] = inp.get("value", "")
+def _add_control(fields: Dict[str, str], ctl: lxml.html.HtmlElement) -> None:
+    if ctl.tag == "input":
+        # inputs (exclude submit inputs; add explicitly when simulating a click)
+        _add_input(fields, ctl)
+    elif ctl.tag == "textarea":
+        fields[ctl.get("name")] = ctl.text or ""
+    else:
+        # selects (choose first selected or first option)
+        opts = ctl.xpath(".//option[@selected]") or ctl.xpath(".//option")
+        fields[ctl.get("name")] = opts[0].get("value") if opts else ""
 
-    # textareas
-    for ta in form.find_all("textarea"):
-        name = ta.get("name")
-        if name:
-            fields[name] = ta.text or ""
 
-    # selects (choose first selected or first option)
-    for sel in form.find_all("select"):
-        name = sel.get("name")
+def find_main_form(doc: lxml.html.HtmlElement) -> Tuple[str, Dict[str, str]]:
+    """Return (action_url, fields) for the main ASP.NET form."""
+    form = _main_form(doc)
+    fields: Dict[str, str] = {}
+    # One XPath pass (evaluated in libxml2) over every named control
+    for ctl in form.xpath(_CONTROLS_XPATH):
+        _add_control(fields, ctl)
+    return form.get("action") or "", fields
+
+
+def fast_parse_form(content: bytes) -> Tuple[str, Dict[str, str]]:
+    """find_main_form straight from bytes, using selectolax when it is installed."""
+    if LexborHTMLParser is None:
+        return find_main_form(parse_html(content))
+    tree = LexborHTMLParser(content)
+    form = tree.css_first("form[id]") or tree.css_first("form[name]") or tree.css_first("form")
+    if form is None:
+        raise RuntimeError("No <form> found on page")
+
+    action = form.attributes.get("action") or ""
+    fields: Dict[str, str] = {}
+    for ctl in form.css("input[name], textarea[name], select[name]"):
+        attrs = ctl.attributes
+        name = attrs["name"]
         if not name:
             continue
-        selected = sel.find("option", selected=True)
-        if not selected:
-            selected = sel.find("option")
-        fields[name] = selected.get("value") if selected else ""
-
+        if ctl.tag == "input":
+            itype = (attrs.get("type") or "").lower()
+            if itype == "submit":
+                continue
+            if itype in {"checkbox", "radio"}:
+                if "checked" in attrs:
+                    fields[name] = attrs.get("value", "on") or ""
+            else:
+                fields[name] = attrs.get("value") or ""
+        elif ctl.tag == "textarea":
+            fields[name] = ctl.text() or ""
+        else:
+            opt = ctl.css_first("option[selected]") or ctl.css_first("option")
+            fields[name] = opt.attributes.get("value") if opt is not None else ""
     return action, fields
 
 
-def extract_form_fields(soup: BeautifulSoup) -> Tuple[str, Dict[str, str]]:
-    """Extract form action and fields, excluding submit inputs.
+def extract_form_fields(doc: lxml.html.HtmlElement) -> Tuple[str, Dict[str, str], Dict[str, str]]:
+    """Extract (action, state, fields) from the form, excluding submit inputs.
 
-    Useful when moving across postbacks to ensure fresh state fields.
+    One pass over the inputs splits the ASP.NET hidden state (__VIEWSTATE,
+    __EVENTVALIDATION, etc.), which must be posted back each request, from the
+    regular controls. Useful when moving across postbacks to ensure fresh state.
     """
-    form = soup.find("form")
-    if not form:
+    forms = doc.xpath("//form")
+    if not forms:
         raise RuntimeError("No <form> found on page")
+    form = forms[0]
     action = form.get("action") or ""
+    state: Dict[str, str] = {}
     fields: Dict[str, str] = {}
-    for inp in form.find_all("input"):
+    for inp in form.iter("input"):
         name = inp.get("name")
+        if name:
+            _add_input(state if name.startswith("__") else fields, inp)
+    return action, state, fields
+
+
+# Regex fast paths over the raw response bytes. The council pages carry a stable
+# set of ASP.NET controls (all <input>s plus at most the address <select>), so the
+# hot path pulls them out without building a DOM; callers fall back to the lxml
+# walkers above when a scan comes up empty or the page has other controls.
+# A tag's attribute text; quoted values may contain '>' (ASP.NET doesn't escape it
+# in e.g. onchange handlers), so a bare [^>]* would end the tag early.
+_TAG_ATTRS = rb'(?:[^>"\']|"[^"]*"|\'[^\']*\')*'
+_FORM_ACTION_RE = re.compile(rb'<form\b' + _TAG_ATTRS + rb'?\saction="([^"]*)"')
+_INPUT_TAG_RE = re.compile(rb'<input\b(' + _TAG_ATTRS + rb')>')
+_ATTR_RE = re.compile(rb'([^\s=/>]+)(?:\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s"\'>]+)))?')
+_ADDRESS_SELECT_RE = re.compile(
+    rb'<select\b(' + _TAG_ATTRS + rb'?\sid="lstAddresses"' + _TAG_ATTRS + rb')>(.*?)</select>', re.S
+)
+_NAME_ATTR_RE = re.compile(rb'\sname="([^"]+)"')
+_OPTION_RE = re.compile(
+    rb'<option\b' + _TAG_ATTRS + rb'?\svalue="([^"]*)"' + _TAG_ATTRS + rb'>([^<]*)</option>'
+)
+
+
+def _unescape(raw: bytes) -> str:
+    return html.unescape(raw.decode("utf-8"))
+
+
+def fast_form_action(content: bytes) -> Optional[str]:
+    m = _FORM_ACTION_RE.search(content)
+    return _unescape(m.group(1)) if m else None
+
+
+def fast_extract_fields(content: bytes, selects: int = 0) -> Optional[Dict[str, str]]:
+    """The form's input fields by regex, matching find_main_form's input handling.
+
+    Covers the ``__*`` hidden state as well as the regular controls (postcode
+    textbox, checked search-by radio, ...). Returns None, so the caller parses
+    the form, when the page has a textarea or other than ``selects`` selects,
+    since those are not scanned here.
+    """
+    start = content.find(b"<form")
+    end = content.rfind(b"</form>")
+    if start < 0 or end < start:
+        return None
+    body = content[start:end]
+    if b"<textarea" in body or body.count(b"<select") != selects:
+        return None
+    fields: Dict[str, str] = {}
+    for tag in _INPUT_TAG_RE.finditer(body):
+        attrs = {
+            m.group(1).lower(): next((v for v in m.group(2, 3, 4) if v is not None), None)
+            for m in _ATTR_RE.finditer(tag.group(1))
+        }
+        name = attrs.get(b"name")
         if not name:
             continue
-        itype = (inp.get("type") or "").lower()
-        if itype == "submit":
+        itype = (attrs.get(b"type") or b"").lower()
+        if itype == b"submit":
             continue
-        if itype in {"checkbox", "radio"}:
-            if inp.has_attr("checked"):
-                fields[name] = inp.get("value", "on")
+        value = attrs.get(b"value")
+        if itype in {b"checkbox", b"radio"}:
+            if b"checked" in attrs:
+                fields[_unescape(name)] = _unescape(value) if value is not None else "on"
         else:
-            fields[name] = inp.get("value", "")
-    return action, fields
+            fields[_unescape(name)] = _unescape(value) if value is not None else ""
+    return fields
 
 
-def extract_state_fields(fields: Dict[str, str]) -> Dict[str, str]:
-    """ASP.NET hidden state fields that must be posted back each request."""
-    return {
-        k: v
-        for k, v in fields.items()
-        if k.startswith("__")  # __VIEWSTATE, __EVENTVALIDATION, etc.
-    }
+def fast_address_dropdown(
+    content: bytes, address_query: Optional[str] = None
+) -> Optional[Tuple[str, Dict[str, str]]]:
+    """Same shape as find_address_dropdown, scanning only the lstAddresses select."""
+    m = _ADDRESS_SELECT_RE.search(content)
+    if not m:
+        return None
+    name = _NAME_ATTR_RE.search(m.group(1))
+    if not name:
+        return None
+    options = (
+        (_unescape(opt.group(2)).strip(), _unescape(opt.group(1)))
+        for opt in _OPTION_RE.finditer(m.group(2))
+        if opt.group(1)
+    )
+    return _unescape(name.group(1)), _match_options(options, address_query)
+
+
+def has_control(content: bytes, name: str) -> bool:
+    return b'name="' + name.encode("utf-8") + b'"' in content
 
 
 def choose_postcode_field(fields: Dict[str, str]) -> Optional[str]:
@@ -120,12 +306,24 @@ def pick_first_submit(fields: Dict[str, str]) -> Optional[str]:
 
 
 VERBOSE = False
-DEBUG_LOG: list[str] = []
+# Per-request trace (last 50 lines), set only while a caller is capturing. A
+# ContextVar rather than a global so concurrent API requests don't share it.
+_debug_log: ContextVar[Optional[Deque[str]]] = ContextVar("debug_log", default=None)
+
+
+def start_debug_capture() -> Deque[str]:
+    """Collect vprint lines for the current request/context and return the buffer."""
+    log: Deque[str] = deque(maxlen=50)
+    _debug_log.set(log)
+    return log
 
 
 def vprint(*args, **kwargs):
-    msg = " ".join(str(a) for a in args)
-    DEBUG_LOG.append(msg)
+    log = _debug_log.get()
+    if not VERBOSE and log is None:
+        return
+    if log is not None:
+        log.append(" ".join(str(a) for a in args))
     if VERBOSE:
         print(*args, **kwargs)
 
@@ -143,81 +341,144 @@ def debug_list_fields(prefix: str, fields: Dict[str, str]) -> None:
             print(f"  {k}={shown!r}")
 
 
-def submit(session: requests.Session, url: str, action: str, data: Dict[str, str]):
+def submit(session: requests.Session, url: str, action: str, data: Dict[str, str], stream: bool = False):
     post_url = absolute_url(url, action)
     hdrs = {
         "Referer": url,
-        "Origin": urlparse.urlsplit(url).scheme + "://" + urlparse.urlsplit(url).netloc,
+        "Origin": BASE_ORIGIN if url.startswith(BASE_ORIGIN + "/") else origin_of(url),
     }
-    return session.post(post_url, data=data, headers=hdrs)
+    return session.post(post_url, data=data, headers=hdrs, stream=stream)
+
+
+# The entry page's form state rarely changes, so the initial GET is skipped while
+# a recent copy is cached; a rejected postback refreshes it (see step1).
+_STATE_CACHE: TTLCache = TTLCache(maxsize=1, ttl=600)
+_STATE_LOCK = threading.Lock()
 
 
-def step1_submit_postcode(session: requests.Session, url: str, postcode: str) -> Tuple[str, BeautifulSoup]:
-    # GET initial page
-    # Add a browser-like UA in case the site varies by UA
-    session.headers.update({
-        "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/126.0 Safari/537.36",
-        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8",
-        "Accept-Language": "en-GB,en;q=0.9",
-    })
+def fetch_entry_form(session: requests.Session, url: str, pc_field: str) -> Tuple[str, Dict[str, str]]:
+    """GET the entry page and return (action, fields), caching them for later lookups."""
     r = session.get(url)
     r.raise_for_status()
-    soup = BeautifulSoup(r.text, "lxml")
 
-    action, fields = find_main_form(soup)
+    fields = fast_extract_fields(r.content)
+    action = fast_form_action(r.content)
+    if not fields or action is None or pc_field not in fields:
+        vprint("step1: fast state scan missed; parsing form")
+        action, fields = fast_parse_form(r.content)
+        if pc_field not in fields:
+            debug_list_fields("Initial page", fields)
+            raise RuntimeError("Postcode input not found in form. The page may have changed.")
+
+    with _STATE_LOCK:
+        _STATE_CACHE[url] = (action, fields)
+    return action, fields
+
 
+def step1_submit_postcode(session: requests.Session, url: str, postcode: str) -> Tuple[str, bytes]:
     # Explicit known control names for this site
     pc_field = "ctl00$MainContent$Postcode_textbox"
     radio_field = "ctl00$MainContent$searchBy_radio"
     submit_field = "ctl00$MainContent$AddressLookup_button"
 
-    if pc_field not in fields:
-        debug_list_fields("Initial page", fields)
-        raise RuntimeError("Postcode input not found in form. The page may have changed.")
-
-    payload = fields.copy()
-    payload[radio_field] = "P"
-    payload[pc_field] = postcode
-    payload[submit_field] = "Find address"
+    with _STATE_LOCK:
+        cached = _STATE_CACHE.get(url)
+    # GET initial page unless its state is cached (callers set UA_HEADERS on the session)
+    action, fields = cached or fetch_entry_form(session, url, pc_field)
 
+    payload = {**fields, radio_field: "P", pc_field: postcode, submit_field: "Find address"}
     resp = submit(session, url, action, payload)
+    if cached and (resp.status_code >= 400 or not has_control(resp.content, pc_field)):
+        # Cached state rejected (e.g. VIEWSTATE MAC failure); refetch and retry once
+        vprint(f"step1: cached form state rejected (status={resp.status_code}); refetching")
+        action, fields = fetch_entry_form(session, url, pc_field)
+        payload = {**fields, radio_field: "P", pc_field: postcode, submit_field: "Find address"}
+        resp = submit(session, url, action, payload)
     resp.raise_for_status()
-    return resp.url, BeautifulSoup(resp.text, "lxml")
+    return resp.url, resp.content
+
 
+def _match_options(
+    options: Iterator[Tuple[str, str]], address_query: Optional[str]
+) -> Dict[str, str]:
+    """Consume (text, value) pairs lazily, stopping at the first that matches the query.
 
-def find_address_dropdown(soup: BeautifulSoup) -> Optional[Tuple[str, Dict[str, str]]]:
+    Returns just that option when found; otherwise the full {text: value} mapping.
+    """
+    values: Dict[str, str] = {}
+    needle = address_query.lower() if address_query else None
+    for text, value in options:
+        if needle and needle in text.lower():
+            return {text: value}
+        values[text] = value
+    return values
+
+
+def find_address_dropdown(
+    doc: lxml.html.HtmlElement, address_query: Optional[str] = None
+) -> Optional[Tuple[str, Dict[str, str]]]:
     # Prefer the explicit address list control
-    addr = soup.find("select", id="lstAddresses")
-    if addr and addr.get("name"):
-        name = addr.get("name")
-        values = {opt.get_text(strip=True): opt.get("value") for opt in addr.find_all("option") if opt.get("value")}
-        return name, values
+    addr = doc.xpath("//select[@id='lstAddresses'][@name!='']")
+    if addr:
+        options = ((node_text(opt), opt.get("value")) for opt in addr[0].iter("option") if opt.get("value"))
+        return addr[0].get("name"), _match_options(options, address_query)
     # Fallback: any select with many options
-    for sel in soup.find_all("select"):
-        options = sel.find_all("option")
-        if len(options) > 1 and sel.get("name"):
-            values = {opt.get_text(strip=True): opt.get("value") for opt in options if opt.get("value")}
+    for sel in doc.xpath("//select[@name!='']"):
+        options = sel.xpath(".//option")
+        if len(options) > 1:
+            values = {node_text(opt): opt.get("value") for opt in options if opt.get("value")}
             return sel.get("name"), values
     return None
 
 
+def find_form_and_dropdown(
+    doc: lxml.html.HtmlElement, address_query: Optional[str] = None
+) -> Tuple[str, Dict[str, str], Optional[Tuple[str, Dict[str, str]]]]:
+    """find_main_form and find_address_dropdown sharing one XPath pass over the form.
+
+    The lstAddresses options come back in the same node-set as the form controls;
+    only a page without that list falls back to the generic dropdown search.
+    """
+    form = _main_form(doc)
+    fields: Dict[str, str] = {}
+    dd_name = None
+    options: List[lxml.html.HtmlElement] = []
+    for node in form.xpath(_CONTROLS_XPATH + " | .//select[@id='lstAddresses']//option[@value!='']"):
+        if node.tag == "option":
+            options.append(node)
+            continue
+        _add_control(fields, node)
+        if node.tag == "select" and node.get("id") == "lstAddresses":
+            dd_name = node.get("name")
+    if dd_name:
+        dd = dd_name, _match_options(((node_text(opt), opt.get("value")) for opt in options), address_query)
+    else:
+        dd = find_address_dropdown(doc, address_query)
+    return form.get("action") or "", fields, dd
+
+
 def step2_select_address(
     session: requests.Session,
     page_url: str,
-    soup: BeautifulSoup,
+    content: bytes,
     address_query: Optional[str] = None,
-) -> Tuple[str, BeautifulSoup]:
-    action, fields = find_main_form(soup)
-
-    dd = find_address_dropdown(soup)
+) -> Tuple[str, lxml.html.HtmlElement]:
+    # The address list is the one select the fast scan allows on this page
+    fields = fast_extract_fields(content, selects=1)
+    action = fast_form_action(content)
+    dd = fast_address_dropdown(content, address_query) if fields and action is not None else None
+    if not dd:
+        vprint("step2: fast dropdown scan missed; parsing form")
+        doc = parse_html(content)
+        action, fields, dd = find_form_and_dropdown(doc, address_query)
     if not dd:
         debug_list_fields("Postcode page", fields)
         # Extra debug: list selects to help diagnose
-        selects = soup.find_all("select")
+        selects = doc.xpath("//select")
         if selects and VERBOSE:
             print("Select elements found:")
             for sel in selects:
-                name = sel.get("name"); sid = sel.get("id"); opts = len(sel.find_all("option"))
+                name = sel.get("name"); sid = sel.get("id"); opts = len(sel.xpath(".//option"))
                 print(f"  select name={name!r} id={sid!r} options={opts}")
         raise RuntimeError("Could not locate an address dropdown after postcode. Inspect the page to adjust selectors.")
 
@@ -251,9 +512,12 @@ def step2_select_address(
         payload["__EVENTTARGET"] = dd_name
         payload.setdefault("__EVENTARGUMENT", "")
 
-    resp = submit(session, page_url, action, payload)
-    resp.raise_for_status()
-    return resp.url, BeautifulSoup(resp.text, "lxml")
+    resp = submit(session, page_url, action, payload, stream=True)
+    return resp.url, read_page(resp, stop_id="BinDetailsPnl")
+
+
+_LEAD_WORDS = frozenset(("FLAT", "APPT", "APT"))
+_LEAD_NUM = re.compile(r"\d")
 
 
 def derive_street_from_hint(address_hint: Optional[str]) -> Optional[str]:
@@ -261,7 +525,7 @@ def derive_street_from_hint(address_hint: Optional[str]) -> Optional[str]:
         return None
     # Strip leading house numbers/flat indicators like '2A', '12', 'Flat 3', etc.
     parts = address_hint.strip().split()
-    while parts and (parts[0].rstrip('.').upper() in {"FLAT", "APPT", "APT"} or any(ch.isdigit() for ch in parts[0])):
+    while parts and (parts[0].rstrip('.').upper() in _LEAD_WORDS or _LEAD_NUM.search(parts[0])):
         parts.pop(0)
     return " ".join(parts) if parts else None
 
@@ -272,53 +536,53 @@ def street_flow(
     street_query: str,
     postcode_hint: Optional[str],
     address_hint: Optional[str],
-) -> Tuple[str, BeautifulSoup]:
+) -> Tuple[str, lxml.html.HtmlElement]:
     # 1) GET initial and search by street
     vprint(f"street_flow: start street_query={street_query!r} postcode_hint={postcode_hint!r}")
-    r = session.get(base_url)
-    r.raise_for_status()
-    soup = BeautifulSoup(r.text, "lxml")
-    action, fields = extract_form_fields(soup)
+    r = session.get(base_url, stream=True)
+    doc = read_page(r)
+    action, state, fields = extract_form_fields(doc)
     fields['ctl00$MainContent$searchBy_radio'] = 'S'
     fields['ctl00$MainContent$Street_textbox'] = street_query
     fields['ctl00$MainContent$streetSearch_button'] = 'Search'
     post_url = absolute_url(base_url, action)
-    resp2 = session.post(post_url, data=fields)
+    resp2 = session.post(post_url, data={**state, **fields}, stream=True)
     vprint(f"street_flow: posted search status={resp2.status_code}")
-    soup2 = BeautifulSoup(resp2.text, 'lxml')
+    doc2 = read_page(resp2, check=False)
 
     # 2) choose a street option (prefer one matching the postcode hint)
-    streets = soup2.find('select', id='streets_listbox')
-    if not streets:
+    found = doc2.xpath("//select[@id='streets_listbox']")
+    streets = found[0] if found else None
+    if streets is None:
         # heuristic fallback: any select whose id/name mentions 'street'
-        for sel in soup2.find_all('select'):
+        for sel in doc2.xpath('//select'):
             sid = (sel.get('id') or '').lower()
             sname = (sel.get('name') or '').lower()
-            if (('street' in sid) or ('street' in sname)) and len(sel.find_all('option')) > 1:
+            if (('street' in sid) or ('street' in sname)) and len(sel.xpath('.//option')) > 1:
                 streets = sel
                 break
-    if not streets:
+    if streets is None:
         vprint('street_flow: no streets select found')
         raise RuntimeError('Street search did not return any street list to select from.')
-    vprint(f"street_flow: streets select id={(streets.get('id') or '')!r} name={(streets.get('name') or '')!r} options={len(streets.find_all('option'))}")
+    vprint(f"street_flow: streets select id={(streets.get('id') or '')!r} name={(streets.get('name') or '')!r} options={len(streets.xpath('.//option'))}")
 
     # Try multiple matching strategies, then fall back to first non-empty value
     chosen_street_val = None
     outward = (postcode_hint or '').split()[0].upper() if postcode_hint else None
-    opts = streets.find_all('option')
+    opts = streets.xpath('.//option')
 
     def _opt_value(opt):
         # Use value attribute if present, otherwise fallback to visible text
         val = (opt.get('value') or '').strip()
         if not val:
-            val = opt.get_text(strip=True)
+            val = node_text(opt)
         return val
 
     # 1) Match outward code in option value or text
     if outward:
         for opt in opts:
             val = _opt_value(opt)
-            txt = opt.get_text(strip=True)
+            txt = node_text(opt)
             if not val:
                 continue
             if outward in val.upper() or outward in txt.upper():
@@ -332,7 +596,7 @@ def street_flow(
         if q:
             for opt in opts:
                 val = _opt_value(opt)
-                txt = opt.get_text(strip=True)
+                txt = node_text(opt)
                 if val and q in txt.lower():
                     chosen_street_val = val
                     vprint(f"street_flow: matched query {q!r} -> {txt!r}")
@@ -344,7 +608,7 @@ def street_flow(
             val = _opt_value(opt)
             if val:
                 chosen_street_val = val
-                vprint(f"street_flow: fallback picked {opt.get_text(strip=True)!r}")
+                vprint(f"street_flow: fallback picked {node_text(opt)!r}")
                 break
 
     if not chosen_street_val:
@@ -352,20 +616,20 @@ def street_flow(
         if VERBOSE:
             print('Street options available:')
             for opt in opts:
-                print(f"  value={_opt_value(opt)!r} text={opt.get_text(strip=True)!r}")
+                print(f"  value={_opt_value(opt)!r} text={node_text(opt)!r}")
         vprint('street_flow: could not select a street option')
         raise RuntimeError('Could not select a street option.')
 
     # 3) post back to select street
-    action2, fields2 = extract_form_fields(soup2)
+    action2, state2, fields2 = extract_form_fields(doc2)
     streets_name = streets.get('name') or 'ctl00$MainContent$streets_listbox'
     fields2[streets_name] = chosen_street_val
     # Try known button; if absent, trigger event target
     select_btn_name = 'ctl00$MainContent$btn_selectStreet'
     select_btn_present = False
-    form2 = soup2.find('form')
-    if form2:
-        for inp in form2.find_all('input'):
+    forms2 = doc2.xpath('//form')
+    if forms2:
+        for inp in forms2[0].iter('input'):
             if (inp.get('type') or '').lower() == 'submit':
                 nm = inp.get('name') or ''
                 lbl = (inp.get('value') or '')
@@ -376,34 +640,34 @@ def street_flow(
     if select_btn_present:
         fields2[select_btn_name] = fields2.get(select_btn_name, 'Select street') or 'Select street'
     else:
-        fields2['__EVENTTARGET'] = streets.get('id') or streets_name
-        fields2.setdefault('__EVENTARGUMENT', '')
-    resp3 = session.post(absolute_url(base_url, action2), data=fields2)
+        state2['__EVENTTARGET'] = streets.get('id') or streets_name
+        state2.setdefault('__EVENTARGUMENT', '')
+    resp3 = session.post(absolute_url(base_url, action2), data={**state2, **fields2}, stream=True)
     vprint(f"street_flow: posted select status={resp3.status_code}")
-    soup3 = BeautifulSoup(resp3.text, 'lxml')
+    doc3 = read_page(resp3, check=False)
 
     # 4) choose address and select
-    addr_sel = soup3.find('select', id='lstAddresses')
-    if not addr_sel:
+    found = doc3.xpath("//select[@id='lstAddresses']")
+    if not found:
         raise RuntimeError('After selecting street, address list not found.')
+    addr_opts = found[0].xpath('.//option')
     chosen_addr_val = None
     if address_hint:
         q = address_hint.lower()
-        for opt in addr_sel.find_all('option'):
-            if q in opt.get_text(strip=True).lower():
+        for opt in addr_opts:
+            if q in node_text(opt).lower():
                 chosen_addr_val = opt.get('value')
                 break
-    if not chosen_addr_val and addr_sel.find('option'):
-        chosen_addr_val = addr_sel.find('option').get('value')
+    if not chosen_addr_val and addr_opts:
+        chosen_addr_val = addr_opts[0].get('value')
     if not chosen_addr_val:
         raise RuntimeError('No address option available to select.')
 
-    action3, fields3 = extract_form_fields(soup3)
+    action3, state3, fields3 = extract_form_fields(doc3)
     fields3['ctl00$MainContent$lstAddresses'] = chosen_addr_val
     fields3['ctl00$MainContent$SelectAddress_button'] = 'Select'
-    final_resp = session.post(absolute_url(base_url, action3), data=fields3)
-    final_resp.raise_for_status()
-    return final_resp.url, BeautifulSoup(final_resp.text, 'lxml')
+    final_resp = session.post(absolute_url(base_url, action3), data={**state3, **fields3}, stream=True)
+    return final_resp.url, read_page(final_resp, stop_id="BinDetailsPnl")
 
 
 def normalize_bin_name(raw: str) -> str:
@@ -421,16 +685,35 @@ def normalize_bin_name(raw: str) -> str:
     return r.title()
 
 
-def parse_bin_details(pnl: BeautifulSoup) -> Tuple[str, Dict[str, datetime]]:
+# Same-day tie-break: General > Recycling > Compost > anything else
+BIN_PREFERENCE = {"General": 0, "Recycling": 1, "Compost": 2}
+DATE_FORMAT_SHORT = "%d/%m/%y"
+DATE_FORMAT_ISO = "%Y-%m-%d"
+
+
+def bin_sort_key(item: Tuple[str, datetime]) -> Tuple[datetime, int]:
+    return item[1], BIN_PREFERENCE.get(item[0], 99)
+
+
+# e.g. "Mon Sep 1 2025" once whitespace is collapsed; checked before strptime so
+# ordinary non-date cells are rejected by a branch rather than a raised ValueError.
+_DATE_RE = re.compile(
+    r"(?:Mon|Tue|Wed|Thu|Fri|Sat|Sun) "
+    r"(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec) \d{1,2} \d{4}",
+    re.IGNORECASE,
+)
+BIN_TABLE_HEADERS = frozenset({"type of bin", "day(s)", "how often?", "next collection"})
+
+
+def parse_bin_details(pnl: lxml.html.HtmlElement) -> Tuple[str, Dict[str, datetime]]:
     # Extract address line and bin entries with next-collection dates
-    lines = [s.strip() for s in pnl.stripped_strings if s and s.strip()]
+    lines = [s for s in (t.strip() for t in pnl.xpath(".//text()")) if s]
     address_line = lines[0] if lines else ""
     # Use only first part before comma and title-case it
     nice_address = address_line.split(",")[0].title()
 
     # Remove header labels if present
-    headers = {"type of bin", "day(s)", "how often?", "next collection"}
-    filtered = [x for x in lines if x.lower() not in headers]
+    filtered = [x for x in lines if x.lower() not in BIN_TABLE_HEADERS]
 
     # Group by pattern: <bin-name>, <day>, <freq>, <date>
     entries: Dict[str, datetime] = {}
@@ -442,15 +725,19 @@ def parse_bin_details(pnl: BeautifulSoup) -> Tuple[str, Dict[str, datetime]]:
         date_str = filtered[i + 3]
         # Heuristic: name contains 'bin' or matches known bins
         if "bin" in name.lower() or any(k in name.lower() for k in ["general", "recycling", "compost", "brown"]):
-            try:
-                # Example: Mon Sep  1 2025 (double-space possible)
-                dt = datetime.strptime(" ".join(date_str.split()), "%a %b %d %Y")
-                entries[normalize_bin_name(name)] = dt
-                i += 4
-                continue
-            except Exception:
-                # Not a date; move on by 1
-                pass
+            # Example: Mon Sep  1 2025 (double-space possible)
+            ds = " ".join(date_str.split())
+            if _DATE_RE.fullmatch(ds):
+                try:
+                    dt = datetime.strptime(ds, "%a %b %d %Y")
+                except ValueError:
+                    # Shaped like a date but not one (e.g. "Mon Sep 31 2025")
+                    pass
+                else:
+                    entries[normalize_bin_name(name)] = dt
+                    i += 4
+                    continue
+        # Not a bin row; move on by 1
         i += 1
 
     return nice_address, entries
@@ -477,37 +764,37 @@ def main():
     address_hint = args.address_hint
 
     with requests.Session() as session:
+        session.headers.update(UA_HEADERS)
         # Step 1: submit postcode and get page with address list
-        page_url, soup = step1_submit_postcode(session, BASE_URL, postcode)
+        page_url, content = step1_submit_postcode(session, BASE_URL, postcode)
 
         # Step 2: select address (postback)
         try:
-            page_url, soup = step2_select_address(session, page_url, soup, address_hint)
+            page_url, doc = step2_select_address(session, page_url, content, address_hint)
         except RuntimeError:
             # Fallback: try street-based flow using the address hint as street fragment
             street_hint = derive_street_from_hint(address_hint) or (address_hint or '')
             if not street_hint:
                 raise
             vprint("Address dropdown not found; trying street-based flow with:", street_hint)
-            page_url, soup = street_flow(session, BASE_URL, street_hint, postcode, address_hint)
+            page_url, doc = street_flow(session, BASE_URL, street_hint, postcode, address_hint)
 
         # Parse results panel
-        pnl = soup.find(id="BinDetailsPnl")
-        if not pnl:
+        pnl = doc.get_element_by_id("BinDetailsPnl", None)
+        if pnl is None:
             print("Reached page, but BinDetailsPnl not found. Dumping preview:")
-            print(soup.get_text(" ", strip=True)[:1000])
+            print(" ".join(stripped_strings(doc))[:1000])
             return
         # Format as requested
         addr, items = parse_bin_details(pnl)
         if not items:
-            print(pnl.get_text("\n", strip=True))
+            print("\n".join(stripped_strings(pnl)))
             return
         # Sort by soonest date; if same day, prefer General > Recycling > Compost
-        pref = {"General": 0, "Recycling": 1, "Compost": 2}
-        order = sorted(items.items(), key=lambda kv: (kv[1], pref.get(kv[0], 99)))
+        order = sorted(items.items(), key=bin_sort_key)
         print(f"{addr} Bin Collections:")
         for name, dt in order:
-            print(f"{name} - {dt.strftime('%d/%m/%y')}")
+            print(f"{name} - {dt.strftime(DATE_FORMAT_SHORT)}")
         print("Visit online.belfastcity.gov.uk/find-bin-collection-day")
 
 